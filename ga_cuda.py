@@ -0,0 +1,212 @@
+"""
+ga_cuda.py
+GPU generation steps for the timetable GA (Numba CUDA).
+
+The population stays on the device as three int32 (pop_size, n_sessions)
+matrices across generations. Fitness runs one block per individual with
+shared-memory conflict counters; tournament selection and
+crossover+mutation run one thread per parent / child pair.
+Only the fitness vector (for elitism and logging) and an improved best
+row are copied back to the host.
+
+Repair is a sequential heuristic and stays CPU-only; it is not applied here.
+Used by timetable_ga.run_ga when --cuda is given; run_ga keeps the
+generation loop (best tracking, logging, stopping rules) for both paths.
+"""
+
+import math
+import numpy as np
+from numba import cuda, int32, float64
+from numba.cuda.random import create_xoroshiro128p_states, xoroshiro128p_uniform_float32
+
+FITNESS_THREADS = 128
+SELECT_THREADS = 128
+MAX_SHARED_BYTES = 48 * 1024
+
+# ---------- Kernels ----------
+@cuda.jit
+def fitness_kernel(pop_ts, pop_room, pop_teacher, s_course, s_group, s_size,
+                   qualified, available, preferred, room_cap, n_groups,
+                   hard_penalty, soft_penalty, out):
+    p = cuda.blockIdx.x
+    tid = cuda.threadIdx.x
+    step = cuda.blockDim.x
+    n = pop_ts.shape[1]
+    n_t = qualified.shape[0]
+    n_ts = available.shape[1]
+    n_r = room_cap.shape[0]
+    # dynamic shared buffer: teacher, room, group (timeslot, resource) counters + distinct slots per teacher
+    o_room = n_ts * n_t
+    o_group = o_room + n_ts * n_r
+    o_unique = o_group + n_ts * n_groups
+    size = o_unique + n_t
+    buf = cuda.shared.array(0, dtype=int32)
+    teacher_count = buf[:o_room]
+    room_count = buf[o_room:o_group]
+    group_count = buf[o_group:o_unique]
+    unique = buf[o_unique:size]
+    total = cuda.shared.array(1, dtype=float64)
+    for k in range(tid, size, step):
+        buf[k] = 0
+    if tid == 0:
+        total[0] = 0.0
+    cuda.syncthreads()
+
+    penalty = 0.0
+    for i in range(tid, n, step):
+        ts = pop_ts[p, i]
+        r = pop_room[p, i]
+        t = pop_teacher[p, i]
+        # capacity check (room capacity >= class size)
+        if s_size[i] > room_cap[r]:
+            penalty += hard_penalty
+        # hard conflicts: any earlier booking of the same key is an extra booking
+        if cuda.atomic.add(teacher_count, ts * n_t + t, 1) > 0:
+            penalty += hard_penalty
+        else:
+            cuda.atomic.add(unique, t, 1)
+        if cuda.atomic.add(room_count, ts * n_r + r, 1) > 0:
+            penalty += hard_penalty
+        if cuda.atomic.add(group_count, ts * n_groups + s_group[i], 1) > 0:
+            penalty += hard_penalty
+        # hard: teacher must be qualified for course
+        if not qualified[t, s_course[i]]:
+            penalty += hard_penalty
+        # soft: availability, small reward for preferred timeslot
+        if not available[t, ts]:
+            penalty += soft_penalty
+        if preferred[t, ts]:
+            penalty -= 1
+    cuda.syncthreads()
+    # soft: distinct timeslots per teacher beyond 3
+    for t in range(tid, n_t, step):
+        if unique[t] > 3:
+            penalty += (unique[t] - 3) * 0.5
+    cuda.atomic.add(total, 0, penalty)
+    cuda.syncthreads()
+    if tid == 0:
+        out[p] = 1.0 / (1 + total[0])
+
+@cuda.jit
+def tournament_kernel(fitnesses, k, rng_states, winners):
+    # one thread per parent slot: best of k uniform draws
+    j = cuda.grid(1)
+    if j >= winners.shape[0]:
+        return
+    pop_size = fitnesses.shape[0]
+    best = -1
+    for _ in range(k):
+        c = min(int(xoroshiro128p_uniform_float32(rng_states, j) * pop_size), pop_size - 1)
+        if best < 0 or fitnesses[c] > fitnesses[best]:
+            best = c
+    winners[j] = best
+
+@cuda.jit(device=True)
+def _pick(ptr, idx, row, u):
+    start = ptr[row]
+    cnt = ptr[row + 1] - start
+    return idx[start + min(int(u * cnt), cnt - 1)]
+
+@cuda.jit
+def breed_kernel(pop_ts, pop_room, pop_teacher, new_ts, new_room, new_teacher, parents, n_elite,
+                 s_course, qual_ptr, qual_idx, avail_ptr, avail_idx, n_rooms, mutation_rate, rng_states):
+    # one thread per parent pair: one-point crossover into two children, then mutation
+    j = cuda.grid(1)
+    if 2 * j >= parents.shape[0]:
+        return
+    pop_size, n = new_ts.shape
+    a = parents[2 * j]
+    b = parents[2 * j + 1]
+    pt = n
+    if n >= 2:
+        pt = 1 + min(int(xoroshiro128p_uniform_float32(rng_states, j) * (n - 1)), n - 2)
+    for child in range(2):
+        row = n_elite + 2 * j + child
+        if row >= pop_size:
+            return
+        first = a if child == 0 else b
+        second = b if child == 0 else a
+        for i in range(n):
+            src = first if i < pt else second
+            ts = pop_ts[src, i]
+            r = pop_room[src, i]
+            t = pop_teacher[src, i]
+            if xoroshiro128p_uniform_float32(rng_states, j) < mutation_rate:
+                # mutate one of timeslot/room/teacher randomly (smart-ish choices)
+                choice = min(int(xoroshiro128p_uniform_float32(rng_states, j) * 3), 2)
+                u = xoroshiro128p_uniform_float32(rng_states, j)
+                if choice == 0:
+                    ts = _pick(avail_ptr, avail_idx, t, u)
+                elif choice == 1:
+                    r = min(int(u * n_rooms), n_rooms - 1)
+                else:
+                    t = _pick(qual_ptr, qual_idx, s_course[i], u)
+            new_ts[row, i] = ts
+            new_room[row, i] = r
+            new_teacher[row, i] = t
+
+# ---------- Device population ----------
+# Device state is a plain dict (like enc/sess): static tables, the current and next
+# population buffers, the fitness vector and the RNG states. timetable_ga.run_ga
+# owns the generation loop and calls the functions below for each step.
+
+def upload_population(pop_ts, pop_room, pop_teacher, sess, enc, elite, seed):
+    if not cuda.is_available():
+        raise RuntimeError("CUDA device not available")
+    pop_size, n = pop_ts.shape
+    n_groups = len(enc['group_ids'])
+    n_ts, n_t, n_r = len(enc['timeslots']), len(enc['teacher_ids']), len(enc['room_ids'])
+    shared_bytes = 4 * (n_ts * (n_t + n_r + n_groups) + n_t)
+    if shared_bytes > MAX_SHARED_BYTES:
+        raise ValueError(f"fitness counters need {shared_bytes} bytes of shared memory "
+                         f"(limit {MAX_SHARED_BYTES}); run without --cuda")
+
+    to_dev = lambda a: cuda.to_device(np.ascontiguousarray(a))
+    cur = [to_dev(pop_ts), to_dev(pop_room), to_dev(pop_teacher)]
+    n_pairs = math.ceil(max(0, pop_size - elite) / 2)
+    return {
+        's_course': to_dev(sess['course']), 's_group': to_dev(sess['group']), 's_size': to_dev(sess['size']),
+        'qualified': to_dev(enc['teacher_qualified']), 'available': to_dev(enc['teacher_available']),
+        'preferred': to_dev(enc['teacher_preferred']), 'room_cap': to_dev(enc['room_cap']),
+        'qual_ptr': to_dev(enc['qualified_ptr']), 'qual_idx': to_dev(enc['qualified_idx']),
+        'avail_ptr': to_dev(enc['available_ptr']), 'avail_idx': to_dev(enc['available_idx']),
+        'cur': cur,
+        'nxt': [cuda.device_array_like(a) for a in cur],
+        'fit': cuda.device_array(pop_size, dtype=np.float64),
+        'parents': cuda.device_array(2 * n_pairs, dtype=np.int64),
+        'rng_states': create_xoroshiro128p_states(max(1, 2 * n_pairs), seed=seed),
+        'n_groups': n_groups, 'n_rooms': n_r, 'elite': elite, 'n_pairs': n_pairs,
+        'shared_bytes': shared_bytes,
+        'fit_threads': max(1, min(FITNESS_THREADS, n)),
+        'select_blocks': max(1, math.ceil(2 * n_pairs / SELECT_THREADS)),
+    }
+
+def device_fitness(gpu, hard_penalty, soft_penalty):
+    # scores the current population on the device; returns the host fitness vector
+    pop_size = gpu['fit'].shape[0]
+    fitness_kernel[pop_size, gpu['fit_threads'], 0, gpu['shared_bytes']](
+        *gpu['cur'], gpu['s_course'], gpu['s_group'], gpu['s_size'], gpu['qualified'], gpu['available'],
+        gpu['preferred'], gpu['room_cap'], gpu['n_groups'], float(hard_penalty), float(soft_penalty), gpu['fit'])
+    return gpu['fit'].copy_to_host()
+
+def download_row(gpu, i):
+    # individual i of the current population as a tuple of host rows
+    return tuple(a[i].copy_to_host() for a in gpu['cur'])
+
+def device_generation(gpu, fitnesses, tournament_k, mutation_rate, hard_penalty, soft_penalty):
+    # elitism, selection, crossover and mutation into the next buffers, then score them
+    elite = gpu['elite']
+    cur, nxt = gpu['cur'], gpu['nxt']
+    # elitism: device-to-device row copies
+    elite_idx = np.argpartition(fitnesses, -elite)[-elite:]
+    for k, idx in enumerate(elite_idx):
+        for src, dst in zip(cur, nxt):
+            dst[k].copy_to_device(src[idx])
+    if gpu['n_pairs']:
+        tournament_kernel[gpu['select_blocks'], SELECT_THREADS](
+            gpu['fit'], tournament_k, gpu['rng_states'], gpu['parents'])
+        breed_kernel[gpu['select_blocks'], SELECT_THREADS](
+            *cur, *nxt, gpu['parents'], elite, gpu['s_course'], gpu['qual_ptr'], gpu['qual_idx'],
+            gpu['avail_ptr'], gpu['avail_idx'], gpu['n_rooms'], mutation_rate, gpu['rng_states'])
+    gpu['cur'], gpu['nxt'] = nxt, cur
+    return device_fitness(gpu, hard_penalty, soft_penalty)
@@ -0,0 +1,298 @@
+"""
+ga_kernels.py
+Numba-compiled hot loops for the timetable GA.
+
+All kernels work on encoded populations: int32 matrices of shape
+(pop_size, n_sessions) for timeslot, room and teacher ids, plus the static
+per-session vectors and lookup tables built in timetable_ga.preprocess.
+Population rows are independent, so every kernel runs prange over rows.
+
+Numba is optional: without it the same functions run as plain Python
+(timetable_ga then scores with its NumPy fitness instead).
+"""
+
+import numpy as np
+
+try:
+    from numba import njit, prange, get_num_threads
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+    prange = range
+
+    def get_num_threads():
+        return 1
+
+    def njit(*args, **kwargs):
+        # no-op stand-in for @njit / @njit(...)
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda f: f
+
+
+# ---------- Helpers ----------
+@njit(cache=True)
+def _sample(idx, k):
+    # k distinct entries of idx (partial Fisher-Yates on a copy)
+    idx = idx.copy()
+    m = idx.shape[0]
+    k = min(k, m)
+    for a in range(k):
+        b = np.random.randint(a, m)
+        idx[a], idx[b] = idx[b], idx[a]
+    return idx[:k]
+
+# ---------- Fitness ----------
+def fitness_batch(pop_ts, pop_room, pop_teacher, s_course, s_group, s_size,
+                  qualified, available, preferred, room_cap, n_groups,
+                  hard_penalty, soft_penalty, hard_cutoff):
+    # one chunk of rows per thread so counter buffers are allocated once per thread
+    n_chunks = max(1, min(pop_ts.shape[0], get_num_threads()))
+    return _fitness_chunks(pop_ts, pop_room, pop_teacher, s_course, s_group, s_size,
+                           qualified, available, preferred, room_cap, n_groups,
+                           hard_penalty, soft_penalty, hard_cutoff, n_chunks)
+
+@njit(parallel=True, cache=True)
+def _fitness_chunks(pop_ts, pop_room, pop_teacher, s_course, s_group, s_size,
+                    qualified, available, preferred, room_cap, n_groups,
+                    hard_penalty, soft_penalty, hard_cutoff, n_chunks):
+    pop_size, n = pop_ts.shape
+    n_t, n_ts = available.shape
+    n_r = room_cap.shape[0]
+    hard_pen = np.empty(pop_size, np.float64)
+    gap_pen = np.empty(pop_size, np.float64)
+    for c in prange(n_chunks):
+        # dense (timeslot, resource) counters: a repeat key is one extra booking
+        teacher_count = np.zeros(n_ts * n_t, np.int32)
+        room_count = np.zeros(n_ts * n_r, np.int32)
+        group_count = np.zeros(n_ts * n_groups, np.int32)
+        unique = np.zeros(n_t, np.int32)
+        for p in range(c, pop_size, n_chunks):
+            hard = 0.0
+            gaps = 0.0
+            for i in range(n):
+                ts = pop_ts[p, i]
+                r = pop_room[p, i]
+                t = pop_teacher[p, i]
+                # capacity check (room capacity >= class size)
+                if s_size[i] > room_cap[r]:
+                    hard += hard_penalty
+                # hard conflicts (teacher, room, group)
+                kt = ts * n_t + t
+                if teacher_count[kt] > 0:
+                    hard += hard_penalty
+                else:
+                    # soft: distinct timeslots per teacher beyond 3
+                    unique[t] += 1
+                    if unique[t] > 3:
+                        gaps += 0.5
+                teacher_count[kt] += 1
+                kr = ts * n_r + r
+                if room_count[kr] > 0:
+                    hard += hard_penalty
+                room_count[kr] += 1
+                kg = ts * n_groups + s_group[i]
+                if group_count[kg] > 0:
+                    hard += hard_penalty
+                group_count[kg] += 1
+                # hard: teacher must be qualified for course
+                if not qualified[t, s_course[i]]:
+                    hard += hard_penalty
+            hard_pen[p] = hard
+            gap_pen[p] = gaps
+            # reset only the buckets this row touched
+            for i in range(n):
+                ts = pop_ts[p, i]
+                teacher_count[ts * n_t + pop_teacher[p, i]] = 0
+                room_count[ts * n_r + pop_room[p, i]] = 0
+                group_count[ts * n_groups + s_group[i]] = 0
+                unique[pop_teacher[p, i]] = 0
+    # rows hard_cutoff or more above the best row already rank last on hard
+    # penalty alone: only the rest get the per-gene soft pass
+    limit = hard_pen.min() + hard_cutoff if pop_size else 0.0
+    out = np.empty(pop_size, np.float64)
+    for p in prange(pop_size):
+        penalty = hard_pen[p] + gap_pen[p]
+        if hard_pen[p] < limit:
+            for i in range(n):
+                t = pop_teacher[p, i]
+                ts = pop_ts[p, i]
+                # soft: availability, small reward for preferred timeslot
+                if not available[t, ts]:
+                    penalty += soft_penalty
+                if preferred[t, ts]:
+                    penalty -= 1
+        out[p] = 1.0 / (1 + penalty)
+    return out
+
+# ---------- Repair heuristic ----------
+@njit(cache=True)
+def _placement_conflicts(i, ts, r, t, teacher_busy, room_busy, group_busy, n_groups,
+                         s_course, s_group, s_size, qualified, room_cap):
+    # conflicts of session i at (ts, r, t) against the bookings in the busy maps
+    n_t = qualified.shape[0]
+    n_r = room_cap.shape[0]
+    cnt = teacher_busy[ts * n_t + t] + room_busy[ts * n_r + r] + group_busy[ts * n_groups + s_group[i]]
+    # capacity conflict
+    if s_size[i] > room_cap[r]:
+        cnt += 1
+    # qualification conflict
+    if not qualified[t, s_course[i]]:
+        cnt += 1
+    return cnt
+
+@njit(cache=True)
+def _book(ts, r, t, g, delta, teacher_busy, room_busy, group_busy, n_t, n_r, n_groups):
+    teacher_busy[ts * n_t + t] += delta
+    room_busy[ts * n_r + r] += delta
+    group_busy[ts * n_groups + g] += delta
+
+@njit(cache=True)
+def _best_room(i, ts, t, teacher_busy, room_busy, group_busy, n_groups,
+               s_course, s_group, s_size, qualified, room_cap, rooms_by_cap):
+    # least-loaded room that fits session i at (ts, t), smallest first; score -1 if none fits
+    best, best_r = -1, 0
+    for r in rooms_by_cap:
+        # filter rooms by capacity before probing the maps
+        if s_size[i] > room_cap[r]:
+            continue
+        score = _placement_conflicts(i, ts, r, t, teacher_busy, room_busy, group_busy, n_groups,
+                                     s_course, s_group, s_size, qualified, room_cap)
+        if best < 0 or score < best:
+            best, best_r = score, r
+            if best == 0:
+                break
+    return best, best_r
+
+@njit(cache=True)
+def _least_loaded(i, teacher_busy, room_busy, group_busy, n_groups, s_course, s_group, s_size,
+                  qualified, qual_ptr, qual_idx, avail_ptr, avail_idx, room_cap, rooms_by_cap, n_timeslots):
+    # ranks (teacher, timeslot, room) candidates for session i by current load:
+    # qualified teachers and their available slots in random order, rooms that
+    # fit smallest first; stops at the first conflict-free one, so ties between
+    # free placements are broken at random.
+    # Scores exclude the qualification conflict every candidate shares when the
+    # course has no qualified teacher.
+    best = -1
+    best_ts = best_r = best_t = 0
+    course = s_course[i]
+    teachers = _sample(qual_idx[qual_ptr[course]:qual_ptr[course + 1]], qual_ptr[course + 1] - qual_ptr[course])
+    if teachers.shape[0] == 0:
+        return best, best_ts, best_r, best_t
+    floor = 0 if qualified[teachers[0], course] else 1
+    for t in teachers:
+        for ts in _sample(avail_idx[avail_ptr[t]:avail_ptr[t + 1]], avail_ptr[t + 1] - avail_ptr[t]):
+            score, r = _best_room(i, ts, t, teacher_busy, room_busy, group_busy, n_groups,
+                                  s_course, s_group, s_size, qualified, room_cap, rooms_by_cap)
+            if score >= 0 and (best < 0 or score - floor < best):
+                best, best_ts, best_r, best_t = score - floor, ts, r, t
+                if best == 0:
+                    return best, best_ts, best_r, best_t
+    # availability is only a soft constraint: before accepting a hard conflict,
+    # try the teachers' other timeslots too
+    all_ts = np.arange(n_timeslots)
+    for t in teachers:
+        for ts in _sample(all_ts, n_timeslots):
+            score, r = _best_room(i, ts, t, teacher_busy, room_busy, group_busy, n_groups,
+                                  s_course, s_group, s_size, qualified, room_cap, rooms_by_cap)
+            if score >= 0 and (best < 0 or score - floor < best):
+                best, best_ts, best_r, best_t = score - floor, ts, r, t
+                if best == 0:
+                    return best, best_ts, best_r, best_t
+    return best, best_ts, best_r, best_t
+
+def repair_batch(pop_ts, pop_room, pop_teacher, s_course, s_group, s_size, qualified,
+                 qual_ptr, qual_idx, avail_ptr, avail_idx, room_cap, rooms_by_cap, n_timeslots, n_groups,
+                 row_seeds):
+    # one chunk of rows per thread so busy maps are allocated once per thread
+    n_chunks = max(1, min(pop_ts.shape[0], get_num_threads()))
+    _repair_chunks(pop_ts, pop_room, pop_teacher, s_course, s_group, s_size, qualified,
+                   qual_ptr, qual_idx, avail_ptr, avail_idx, room_cap, rooms_by_cap, n_timeslots, n_groups,
+                   row_seeds, n_chunks)
+
+@njit(parallel=True, cache=True)
+def _repair_chunks(pop_ts, pop_room, pop_teacher, s_course, s_group, s_size, qualified,
+                   qual_ptr, qual_idx, avail_ptr, avail_idx, room_cap, rooms_by_cap, n_timeslots, n_groups,
+                   row_seeds, n_chunks):
+    pop_size, n = pop_ts.shape
+    n_t = qualified.shape[0]
+    n_r = room_cap.shape[0]
+    all_rooms = np.arange(n_r)
+    for c in prange(n_chunks):
+        # (timeslot, resource) booking counts, updated incrementally as genes move
+        teacher_busy = np.zeros(n_timeslots * n_t, np.int32)
+        room_busy = np.zeros(n_timeslots * n_r, np.int32)
+        group_busy = np.zeros(n_timeslots * n_groups, np.int32)
+        for p in range(c, pop_size, n_chunks):
+            # Numba's RNG state is per thread: seed it per row so the draws a row gets
+            # do not depend on the thread count or scheduling
+            np.random.seed(row_seeds[p])
+            for i in range(n):
+                _book(pop_ts[p, i], pop_room[p, i], pop_teacher[p, i], s_group[i], 1,
+                      teacher_busy, room_busy, group_busy, n_t, n_r, n_groups)
+            # attempt to fix each gene with conflicts by trying alternatives
+            for i in range(n):
+                # take gene i out so the maps only hold the other sessions
+                _book(pop_ts[p, i], pop_room[p, i], pop_teacher[p, i], s_group[i], -1,
+                      teacher_busy, room_busy, group_busy, n_t, n_r, n_groups)
+                if _placement_conflicts(i, pop_ts[p, i], pop_room[p, i], pop_teacher[p, i],
+                                        teacher_busy, room_busy, group_busy, n_groups,
+                                        s_course, s_group, s_size, qualified, room_cap) > 0:
+                    best, ts, r, t = _least_loaded(i, teacher_busy, room_busy, group_busy, n_groups,
+                                                   s_course, s_group, s_size, qualified, qual_ptr, qual_idx,
+                                                   avail_ptr, avail_idx, room_cap, rooms_by_cap, n_timeslots)
+                    if best == 0:
+                        pop_ts[p, i] = ts
+                        pop_room[p, i] = r
+                        pop_teacher[p, i] = t
+                    else:
+                        # last resort: randomize
+                        pop_teacher[p, i] = np.random.randint(n_t)
+                        pop_ts[p, i] = np.random.randint(n_timeslots)
+                        pop_room[p, i] = np.random.randint(n_r)
+                _book(pop_ts[p, i], pop_room[p, i], pop_teacher[p, i], s_group[i], 1,
+                      teacher_busy, room_busy, group_busy, n_t, n_r, n_groups)
+            # reset only the buckets this row touched
+            for i in range(n):
+                _book(pop_ts[p, i], pop_room[p, i], pop_teacher[p, i], s_group[i], -1,
+                      teacher_busy, room_busy, group_busy, n_t, n_r, n_groups)
+
+# ---------- Constructive initialization ----------
+def construct_batch(pop_ts, pop_room, pop_teacher, order, s_course, s_group, s_size, qualified,
+                    qual_ptr, qual_idx, avail_ptr, avail_idx, room_cap, rooms_by_cap, n_timeslots, n_groups,
+                    row_seeds):
+    # one chunk of rows per thread so busy maps are allocated once per thread
+    n_chunks = max(1, min(pop_ts.shape[0], get_num_threads()))
+    _construct_chunks(pop_ts, pop_room, pop_teacher, order, s_course, s_group, s_size, qualified,
+                      qual_ptr, qual_idx, avail_ptr, avail_idx, room_cap, rooms_by_cap, n_timeslots, n_groups,
+                      row_seeds, n_chunks)
+
+@njit(parallel=True, cache=True)
+def _construct_chunks(pop_ts, pop_room, pop_teacher, order, s_course, s_group, s_size, qualified,
+                      qual_ptr, qual_idx, avail_ptr, avail_idx, room_cap, rooms_by_cap, n_timeslots, n_groups,
+                      row_seeds, n_chunks):
+    pop_size, n = pop_ts.shape
+    n_t = qualified.shape[0]
+    n_r = room_cap.shape[0]
+    for c in prange(n_chunks):
+        teacher_busy = np.zeros(n_timeslots * n_t, np.int32)
+        room_busy = np.zeros(n_timeslots * n_r, np.int32)
+        group_busy = np.zeros(n_timeslots * n_groups, np.int32)
+        for p in range(c, pop_size, n_chunks):
+            np.random.seed(row_seeds[p])
+            # place sessions hardest-first into the least-loaded placement of the partial
+            # schedule; the random teacher/slot order in _least_loaded keeps rows distinct
+            for i in order:
+                best, ts, r, t = _least_loaded(i, teacher_busy, room_busy, group_busy, n_groups,
+                                               s_course, s_group, s_size, qualified, qual_ptr, qual_idx,
+                                               avail_ptr, avail_idx, room_cap, rooms_by_cap, n_timeslots)
+                if best >= 0:
+                    pop_ts[p, i] = ts
+                    pop_room[p, i] = r
+                    pop_teacher[p, i] = t
+                _book(pop_ts[p, i], pop_room[p, i], pop_teacher[p, i], s_group[i], 1,
+                      teacher_busy, room_busy, group_busy, n_t, n_r, n_groups)
+            # reset only the buckets this row touched
+            for i in range(n):
+                _book(pop_ts[p, i], pop_room[p, i], pop_teacher[p, i], s_group[i], -1,
+                      teacher_busy, room_busy, group_busy, n_t, n_r, n_groups)
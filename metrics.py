@@ -1,5 +1,4 @@
 import pandas as pd
-from collections import defaultdict
 import matplotlib.pyplot as plt
 
 df = pd.read_csv("data/generated_timetable.csv")
@@ -27,11 +26,25 @@ print("\nTeacher workload:")
 for t, c in teacher_load.items():
     print(f"  Teacher {t}: {c} lectures")
 
-# 4️⃣ Teacher idle gaps
-teacher_gaps = defaultdict(int)
-for t in df['teacher'].unique():
-    slots = sorted(df[df['teacher'] == t]['timeslot'])
-    teacher_gaps[t] = max(0, len(slots) - len(set(slots)))
+# 4️⃣ Teacher double bookings (lectures sharing a timeslot)
+slot_counts = df.groupby('teacher', sort=False)['timeslot'].agg(['size', 'nunique'])
+teacher_double = slot_counts['size'] - slot_counts['nunique']
+
+print("\nTeacher double bookings:")
+for t, d in teacher_double.items():
+    print(f"  Teacher {t}: {d}")
+
+# 5️⃣ Teacher idle gaps (free slots between lectures on the same day)
+# slots are ranked by their position within the day in timeslots.csv, so ids need not
+# encode numeric hours and slot lengths may vary
+ts_ids = pd.read_csv("data/timeslots.csv", usecols=['ts_id'], dtype=str)['ts_id']
+slot_pos = pd.Series(ts_ids.groupby(ts_ids.str.split('_').str[0]).cumcount().values, index=ts_ids)
+slots = (df.assign(pos=df['timeslot'].map(slot_pos))
+           .dropna(subset=['pos'])
+           .drop_duplicates(['teacher', 'day', 'pos'])
+           .sort_values(['teacher', 'day', 'pos']))
+gaps = slots.groupby(['teacher', 'day'])['pos'].diff().sub(1).clip(lower=0)
+teacher_gaps = gaps.groupby(slots['teacher']).sum().astype(int).reindex(teacher_double.index, fill_value=0)
 
 print("\nTeacher idle gaps:")
 for t, g in teacher_gaps.items():
@@ -0,0 +1,118 @@
+"""
+test_fitness.py
+Parity checks for the three fitness implementations on the sample CSVs:
+the Numba kernel (fitness_batch), the NumPy fallback and the original
+dict-based scoring they replaced.
+"""
+
+import os
+from collections import defaultdict
+
+import numpy as np
+import pytest
+
+import timetable_ga as tga
+from ga_kernels import fitness_batch
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+# ---------- Reference ----------
+def reference_fitness(ind, rooms_map, teachers):
+    # original per-gene scoring over gene dicts, kept verbatim as the ground truth
+    penalty = 0
+    ts_teacher = defaultdict(list)
+    ts_room = defaultdict(list)
+    ts_group = defaultdict(list)
+    for g in ind:
+        ts_teacher[(g['timeslot'], g['teacher'])].append(g)
+        ts_room[(g['timeslot'], g['room'])].append(g)
+        ts_group[(g['timeslot'], g['group'])].append(g)
+        if g['size'] > rooms_map.get(g['room'], 0):
+            penalty += tga.HARD_PENALTY
+    for d in (ts_teacher, ts_room, ts_group):
+        for lst in d.values():
+            if len(lst) > 1:
+                penalty += tga.HARD_PENALTY * (len(lst) - 1)
+    for g in ind:
+        if g['course'] not in teachers[g['teacher']]['qualified']:
+            penalty += tga.HARD_PENALTY
+    for g in ind:
+        if g['timeslot'] not in teachers[g['teacher']]['available']:
+            penalty += tga.SOFT_PENALTY
+        if g['timeslot'] in teachers[g['teacher']]['preferred']:
+            penalty -= 1
+    teacher_sessions = defaultdict(list)
+    for g in ind:
+        teacher_sessions[g['teacher']].append(g['timeslot'])
+    for slots in teacher_sessions.values():
+        penalty += max(0, len(set(slots)) - 3) * 0.5
+    return 1.0 / (1 + penalty)
+
+
+# ---------- Fixtures ----------
+@pytest.fixture(scope="module")
+def problem():
+    courses, teachers, groups, rooms, timeslots, enc = tga.preprocess(*tga.load_data(DATA_DIR))
+    sessions = tga.build_session_list(courses)
+    sess = tga.encode_sessions(sessions, enc)
+    # greedy rows are near-feasible, random rows are not: both sides of the soft-term cutoff
+    greedy = tga.init_population(sess, enc, 100)
+    rand = tga.random_population(sess, enc, 300)
+    pop = tuple(np.concatenate([a, b]) for a, b in zip(greedy, rand))
+    return sessions, sess, enc, teachers, rooms, pop
+
+
+def _numba_scores(pop, sess, enc):
+    return fitness_batch(*pop, sess['course'], sess['group'], sess['size'],
+                         enc['teacher_qualified'], enc['teacher_available'], enc['teacher_preferred'],
+                         enc['room_cap'], len(enc['group_ids']), float(tga.HARD_PENALTY),
+                         float(tga.SOFT_PENALTY), float(tga.HARD_CUTOFF))
+
+
+def _numpy_scores(pop, sess, enc, monkeypatch):
+    with monkeypatch.context() as m:
+        m.setattr(tga, "HAVE_NUMBA", False)
+        return tga.fitness(*pop, sess, enc)
+
+
+def _reference_scores(pop, sessions, enc, teachers, rooms):
+    rooms_map = {r['id']: r['cap'] for r in rooms}
+    scores = []
+    for ts, room, teacher in zip(*pop):
+        ind = [{'course': s['course'], 'group': s['group'], 'size': s['size'],
+                'timeslot': enc['timeslots'][ts[i]], 'room': enc['room_ids'][room[i]],
+                'teacher': enc['teacher_ids'][teacher[i]]} for i, s in enumerate(sessions)]
+        scores.append(reference_fitness(ind, rooms_map, teachers))
+    return np.array(scores)
+
+
+# ---------- Tests ----------
+def test_numba_matches_numpy(problem, monkeypatch):
+    sessions, sess, enc, teachers, rooms, pop = problem
+    np.testing.assert_array_equal(_numba_scores(pop, sess, enc), _numpy_scores(pop, sess, enc, monkeypatch))
+    # empty batch, as scored for the children when pop_size == ELITE
+    empty = tuple(a[:0] for a in pop)
+    assert _numba_scores(empty, sess, enc).shape == (0,)
+    assert _numpy_scores(empty, sess, enc, monkeypatch).shape == (0,)
+
+
+def test_full_scoring_matches_reference(problem, monkeypatch):
+    # with the soft-term cutoff disabled every row is scored exactly like the original
+    sessions, sess, enc, teachers, rooms, pop = problem
+    monkeypatch.setattr(tga, "HARD_CUTOFF", float("inf"))
+    expected = _reference_scores(pop, sessions, enc, teachers, rooms)
+    np.testing.assert_allclose(_numba_scores(pop, sess, enc), expected, rtol=1e-12)
+    np.testing.assert_allclose(_numpy_scores(pop, sess, enc, monkeypatch), expected, rtol=1e-12)
+
+
+def test_cutoff_keeps_ranking(problem):
+    # rows near the best keep their exact score; coarse-scored rows never outrank a better row
+    sessions, sess, enc, teachers, rooms, pop = problem
+    got = _numba_scores(pop, sess, enc)
+    expected = _reference_scores(pop, sessions, enc, teachers, rooms)
+    hard = np.round((1 / expected - 1) / tga.HARD_PENALTY)
+    near = hard < hard.min() + tga.HARD_CUTOFF / tga.HARD_PENALTY
+    assert near.any() and not near.all()
+    np.testing.assert_allclose(got[near], expected[near], rtol=1e-12)
+    assert got[~near].max() < got[near].min()
@@ -0,0 +1,45 @@
+"""
+test_run_ga.py
+Reproducibility of a full GA run on the sample CSVs: the same RANDOM_SEED
+must give the same timetable, whatever the Numba thread count.
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+import timetable_ga as tga
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+def _run(monkeypatch, generations=40):
+    # fresh module RNG per run, as at import time
+    monkeypatch.setattr(tga, "rng", np.random.default_rng(tga.RANDOM_SEED))
+    courses, teachers, groups, rooms, timeslots, enc = tga.preprocess(*tga.load_data(DATA_DIR))
+    sessions = tga.build_session_list(courses)
+    return tga.run_ga(sessions, enc, generations=generations, patience=None)
+
+
+def _assert_same(a, b):
+    (ind_a, fit_a), (ind_b, fit_b) = a, b
+    assert fit_a == fit_b
+    for x, y in zip(ind_a, ind_b):
+        np.testing.assert_array_equal(x, y)
+
+
+def test_same_seed_same_result(monkeypatch):
+    _assert_same(_run(monkeypatch), _run(monkeypatch))
+
+
+@pytest.mark.skipif(not tga.HAVE_NUMBA, reason="needs numba")
+def test_result_independent_of_thread_count(monkeypatch):
+    import numba
+    n_threads = numba.get_num_threads()
+    try:
+        numba.set_num_threads(1)
+        single = _run(monkeypatch)
+    finally:
+        numba.set_num_threads(n_threads)
+    _assert_same(single, _run(monkeypatch))
@@ -7,50 +7,63 @@ Run: python timetable_ga.py
 Output: data/generated_timetable.csv
 """
 
-import random
-import copy
 import math
+import numpy as np
 import pandas as pd
-from collections import defaultdict, Counter
+from collections import Counter
 import argparse
 import sys
+import time
+
+from ga_kernels import HAVE_NUMBA, fitness_batch, repair_batch, construct_batch
 
 
 POP_SIZE = 100
 GENERATIONS = 800
 TOURNAMENT_K = 3
-MUTATION_RATE = 0.2
+MUTATION_RATE = 0.2          # starting mutation rate, decays linearly to MIN_MUTATION_RATE
+MIN_MUTATION_RATE = 0.02
+DIVERSITY_TOL = 1e-9         # stop once fitness std falls below this fraction of the best fitness
+STAGNATION_LIMIT = 300       # stop after this many generations without a new best (None/0: off)
 ELITE = 4
+GREEDY_INIT_FRACTION = 0.5   # share of the initial population built greedily; rest is random
 HARD_PENALTY = 10**6   
 SOFT_PENALTY = 5       
+HARD_CUTOFF = 10 * HARD_PENALTY   # rows this much hard penalty above the batch's best skip soft availability terms
 RANDOM_SEED = 42
 
-random.seed(RANDOM_SEED)
+# the only RNG seeded directly; compiled kernels get per-row seeds drawn from it
+rng = np.random.default_rng(RANDOM_SEED)
+
 
+def _read_csv(data_dir, name, dtype):
+    # dtypes are fixed at parse time (ids stay strings, counts are parsed as ints once)
+    # and na_filter=False keeps empty fields as "" without a NaN scan; unused columns are skipped
+    return pd.read_csv(f"{data_dir}/{name}.csv", usecols=lambda c: c in dtype, dtype=dtype,
+                       na_filter=False, engine='c')
 
 def load_data(data_dir="data"):
-    courses = pd.read_csv(f"{data_dir}/courses.csv", dtype=str).fillna("")
-    teachers = pd.read_csv(f"{data_dir}/teachers.csv", dtype=str).fillna("")
-    groups = pd.read_csv(f"{data_dir}/groups.csv", dtype=str).fillna("")
-    rooms = pd.read_csv(f"{data_dir}/rooms.csv", dtype=str).fillna("")
-    timeslots = pd.read_csv(f"{data_dir}/timeslots.csv", dtype=str).fillna("")
-    # convert types where needed
-    courses['lectures_per_week'] = courses['lectures_per_week'].astype(int)
-    courses['expected_size'] = courses['expected_size'].astype(int)
-    rooms['capacity'] = rooms['capacity'].astype(int)
+    courses = _read_csv(data_dir, "courses", {'course_id': str, 'lectures_per_week': 'int32', 'group_id': str,
+                                              'expected_size': 'int32'})
+    teachers = _read_csv(data_dir, "teachers", {'teacher_id': str, 'teacher_name': str, 'qualified_courses': str,
+                                                'available_timeslots': str, 'preferred_timeslots': str})
+    groups = _read_csv(data_dir, "groups", {'group_id': str, 'students_count': 'int32', 'enrolled_courses': str})
+    rooms = _read_csv(data_dir, "rooms", {'room_id': str, 'capacity': 'int32', 'features': str})
+    timeslots = _read_csv(data_dir, "timeslots", {'ts_id': str})
     return courses, teachers, groups, rooms, timeslots
 
 # ---------- Preprocessing ----------
 def preprocess(courses, teachers_df, groups_df, rooms_df, timeslots_df):
     # dicts for fast lookup
     courses_d = courses.to_dict(orient='records')
+    # id sets: O(1) membership; random picks use the encoded candidate lists
     teachers = {}
     for r in teachers_df.to_dict(orient='records'):
         teachers[r['teacher_id']] = {
             'name': r['teacher_name'],
-            'qualified': r['qualified_courses'].split(';') if r['qualified_courses'] else [],
-            'available': r['available_timeslots'].split(';') if r['available_timeslots'] else [],
-            'preferred': r['preferred_timeslots'].split(';') if r['preferred_timeslots'] else []
+            'qualified': frozenset(r['qualified_courses'].split(';')) if r['qualified_courses'] else frozenset(),
+            'available': frozenset(r['available_timeslots'].split(';')) if r['available_timeslots'] else frozenset(),
+            'preferred': frozenset(r['preferred_timeslots'].split(';')) if r['preferred_timeslots'] else frozenset()
         }
     groups = {}
     for r in groups_df.to_dict(orient='records'):
@@ -60,11 +73,83 @@ def preprocess(courses, teachers_df, groups_df, rooms_df, timeslots_df):
         }
     rooms = [{'id': r['room_id'], 'cap': int(r['capacity']), 'features': r.get('features','')} for r in rooms_df.to_dict(orient='records')]
     timeslots = [r['ts_id'] for r in timeslots_df.to_dict(orient='records')]
-    return courses_d, teachers, groups, rooms, timeslots
+    enc = encode_tables(courses_d, teachers, groups, rooms, timeslots)
+    return courses_d, teachers, groups, rooms, timeslots, enc
+
+# ---------- Integer encoding ----------
+# teachers/rooms/groups/timeslots/courses are mapped to small int ids once so the
+# whole population can be scored with NumPy instead of per-gene dict lookups
+
+def encode_tables(courses_d, teachers, groups, rooms, timeslots):
+    teacher_ids = list(teachers.keys())
+    room_ids = [r['id'] for r in rooms]
+    course_ids = list(dict.fromkeys(c['course_id'] for c in courses_d))
+    group_ids = list(dict.fromkeys(list(groups.keys()) + [c['group_id'] for c in courses_d]))
+    enc = {
+        'teacher_ids': teacher_ids,
+        'room_ids': room_ids,
+        'course_ids': course_ids,
+        'group_ids': group_ids,
+        'timeslots': list(timeslots),
+        'teacher_index': {t: i for i, t in enumerate(teacher_ids)},
+        'room_index': {r: i for i, r in enumerate(room_ids)},
+        'course_index': {c: i for i, c in enumerate(course_ids)},
+        'group_index': {g: i for i, g in enumerate(group_ids)},
+        'ts_index': {ts: i for i, ts in enumerate(timeslots)},
+    }
+    n_t, n_c, n_ts = len(teacher_ids), len(course_ids), len(timeslots)
+    qualified = np.zeros((n_t, n_c), dtype=np.bool_)
+    available = np.zeros((n_t, n_ts), dtype=np.bool_)
+    preferred = np.zeros((n_t, n_ts), dtype=np.bool_)
+    for i, tid in enumerate(teacher_ids):
+        t = teachers[tid]
+        # ids not present in the other CSVs can never match a gene, so drop them
+        for c in t['qualified']:
+            if c in enc['course_index']:
+                qualified[i, enc['course_index'][c]] = True
+        for ts in t['available']:
+            if ts in enc['ts_index']:
+                available[i, enc['ts_index'][ts]] = True
+        for ts in t['preferred']:
+            if ts in enc['ts_index']:
+                preferred[i, enc['ts_index'][ts]] = True
+    enc['teacher_qualified'] = qualified
+    enc['teacher_available'] = available
+    enc['teacher_preferred'] = preferred
+    # candidate lists built once for random picks in init/mutation/repair:
+    # qualified teachers per course (any teacher if none) and available
+    # timeslots per teacher (any timeslot if none), flattened as ptr/idx arrays
+    enc['qualified_ptr'], enc['qualified_idx'] = _candidate_lists(qualified.T)
+    enc['available_ptr'], enc['available_idx'] = _candidate_lists(available)
+    enc['room_cap'] = np.array([r['cap'] for r in rooms], dtype=np.int32)
+    # smallest fitting room first when repair ranks placements
+    enc['rooms_by_cap'] = np.argsort(enc['room_cap'], kind='stable').astype(np.int32)
+    return enc
+
+def _candidate_lists(table):
+    # row r's candidates are idx[ptr[r]:ptr[r+1]]; an all-False row falls back to every column
+    rows = [np.flatnonzero(row) if row.any() else np.arange(table.shape[1]) for row in table]
+    ptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    ptr[1:] = np.cumsum([len(r) for r in rows])
+    idx = np.concatenate(rows).astype(np.int32) if rows else np.zeros(0, dtype=np.int32)
+    return ptr, idx
+
+def encode_sessions(sessions, enc):
+    # static per-session vectors shared by every individual
+    return {
+        'course': np.array([enc['course_index'][s['course']] for s in sessions], dtype=np.int32),
+        'group': np.array([enc['group_index'][s['group']] for s in sessions], dtype=np.int32),
+        'size': np.array([s['size'] for s in sessions], dtype=np.int32),
+    }
+
 
 # ---------- Chromosome representation ----------
-# Each gene = dict: {session_id, course_id, group_id, timeslot, room, teacher}
+# Structure of arrays: a population is a tuple (pop_ts, pop_room, pop_teacher) of
+# int32 matrices of shape (pop_size, n_sessions) holding encoded ids; row p is an
+# individual, column i is session i. Static course/group/size per session are
+# stored once for everyone (see encode_sessions).
 # session_id: unique id for each lecture occurrence (course_id + index)
+TS, ROOM, TEACHER = 0, 1, 2   # gene fields
 
 def build_session_list(courses):
     sessions = []
@@ -78,182 +163,188 @@ def build_session_list(courses):
     return sessions
 
 # ---------- Initialization ----------
-def random_gene(session, timeslots, rooms, teachers):
+def _pick(ptr, idx, rows, u):
+    # candidate of each row chosen by uniform draws u in [0, 1)
+    start = ptr[rows]
+    return idx[start + (u * (ptr[rows + 1] - start)).astype(np.int64)]
+
+def random_population(sess, enc, pop_size):
+    shape = (pop_size, len(sess['course']))
+    pop_ts = rng.integers(0, len(enc['timeslots']), size=shape, dtype=np.int32)
+    pop_room = rng.integers(0, len(enc['room_ids']), size=shape, dtype=np.int32)
     # pick teacher who is qualified for course
-    qualified_teachers = [tid for tid,t in teachers.items() if session['course'] in t['qualified']]
-    if not qualified_teachers:
-        qualified_teachers = list(teachers.keys())
-    teacher = random.choice(qualified_teachers)
-    ts = random.choice(timeslots)
-    room = random.choice(rooms)['id']
-    return {'session_id': session['session_id'], 'course': session['course'], 'group': session['group'], 'size': session['size'],
-            'timeslot': ts, 'room': room, 'teacher': teacher}
-
-def init_individual(sessions, timeslots, rooms, teachers):
-    return [random_gene(s, timeslots, rooms, teachers) for s in sessions]
+    courses = np.broadcast_to(sess['course'], shape)
+    pop_teacher = _pick(enc['qualified_ptr'], enc['qualified_idx'], courses, rng.random(shape))
+    return pop_ts, pop_room, pop_teacher
+
+def construction_order(sess, enc):
+    # hardest-to-place sessions first: largest size, fewest qualified teachers,
+    # then sessions of the groups with the most lectures
+    n_qualified = np.diff(enc['qualified_ptr'])[sess['course']]
+    group_load = np.bincount(sess['group'], minlength=len(enc['group_ids']))[sess['group']]
+    return np.lexsort((-group_load, n_qualified, -sess['size'])).astype(np.int32)
+
+def init_population(sess, enc, pop_size):
+    pop = random_population(sess, enc, pop_size)
+    n_greedy = int(pop_size * GREEDY_INIT_FRACTION)
+    if n_greedy:
+        construct_batch(*(a[:n_greedy] for a in pop), construction_order(sess, enc),
+                        sess['course'], sess['group'], sess['size'], enc['teacher_qualified'],
+                        enc['qualified_ptr'], enc['qualified_idx'], enc['available_ptr'], enc['available_idx'],
+                        enc['room_cap'], enc['rooms_by_cap'], len(enc['timeslots']), len(enc['group_ids']),
+                        rng.integers(2**31, size=n_greedy))
+    return pop
 
 # ---------- Fitness ----------
-def fitness(ind, rooms_map, teachers, groups):
-    penalty = 0
-    # maps to detect conflicts
-    ts_teacher = defaultdict(list)
-    ts_room = defaultdict(list)
-    ts_group = defaultdict(list)
-
-    for g in ind:
-        key_t = (g['timeslot'], g['teacher'])
-        key_r = (g['timeslot'], g['room'])
-        key_g = (g['timeslot'], g['group'])
-        ts_teacher[key_t].append(g)
-        ts_room[key_r].append(g)
-        ts_group[key_g].append(g)
-        # capacity check (room capacity >= class size)
-        room_cap = rooms_map.get(g['room'], 0)
-        if g['size'] > room_cap:
-            penalty += HARD_PENALTY
-
-    # hard conflicts (teacher, room, group)
-    for d in (ts_teacher, ts_room, ts_group):
-        for key, lst in d.items():
-            if len(lst) > 1:
-                # for each extra booking add HARD_PENALTY
-                penalty += HARD_PENALTY * (len(lst) - 1)
+def _bucket_counts(keys, n_keys):
+    # per-row histogram of keys in [0, n_keys): shape (pop_size, n_keys)
+    pop_size = keys.shape[0]
+    offsets = np.arange(pop_size, dtype=np.int64)[:, None] * n_keys
+    return np.bincount((offsets + keys).ravel(), minlength=pop_size * n_keys).reshape(pop_size, n_keys)
+
+def fitness(pop_ts, pop_room, pop_teacher, sess, enc):
+    # scores the whole population at once; returns a float array of shape (pop_size,)
+    if HAVE_NUMBA:
+        return fitness_batch(pop_ts, pop_room, pop_teacher, sess['course'], sess['group'], sess['size'],
+                             enc['teacher_qualified'], enc['teacher_available'], enc['teacher_preferred'],
+                             enc['room_cap'], len(enc['group_ids']), float(HARD_PENALTY), float(SOFT_PENALTY),
+                             float(HARD_CUTOFF))
+    # NumPy fallback: the same bucketed counts via one bincount per resource
+    pop_size, n = pop_ts.shape
+    n_t = len(enc['teacher_ids'])
+    n_r = len(enc['room_ids'])
+    n_g = len(enc['group_ids'])
+    n_ts = len(enc['timeslots'])
+    penalty = np.zeros(pop_size, dtype=np.float64)
+    # nothing to score (e.g. no children when pop_size == ELITE)
+    if n == 0 or pop_size == 0:
+        return 1.0 / (1 + penalty)
+
+    # capacity check (room capacity >= class size)
+    penalty += HARD_PENALTY * (sess['size'] > enc['room_cap'][pop_room]).sum(axis=1)
+
+    # hard conflicts (teacher, room, group): count composite (timeslot, resource) keys;
+    # extra bookings = sessions - occupied buckets
+    teacher_counts = _bucket_counts(pop_ts * n_t + pop_teacher, n_ts * n_t)
+    room_counts = _bucket_counts(pop_ts * n_r + pop_room, n_ts * n_r)
+    group_counts = _bucket_counts(pop_ts * n_g + sess['group'], n_ts * n_g)
+    for counts in (teacher_counts, room_counts, group_counts):
+        penalty += HARD_PENALTY * (n - np.count_nonzero(counts, axis=1))
 
     # hard: teacher must be qualified for course
-    for g in ind:
-        if g['course'] not in teachers[g['teacher']]['qualified']:
-            penalty += HARD_PENALTY
+    penalty += HARD_PENALTY * (~enc['teacher_qualified'][pop_teacher, sess['course']]).sum(axis=1)
+
+    # rows HARD_CUTOFF or more above the best row already rank last on hard penalty
+    # alone: only the rest get the per-gene availability terms
+    rows = np.flatnonzero(penalty < penalty.min() + HARD_CUTOFF)
 
+    # soft: minimize teacher gaps (approximate by counting distinct timeslots per teacher)
+    unique = (teacher_counts.reshape(pop_size, n_ts, n_t) > 0).sum(axis=1)
+    penalty += np.maximum(0, unique - 3).sum(axis=1) * 0.5
+
+    pop_ts, pop_teacher = pop_ts[rows], pop_teacher[rows]
     # soft: teacher availability preferences (penalize if timeslot not available)
-    for g in ind:
-        if g['timeslot'] not in teachers[g['teacher']]['available']:
-            penalty += SOFT_PENALTY
-
-        # small reward for preferred timeslot (we model as negative penalty)
-        if g['timeslot'] in teachers[g['teacher']]['preferred']:
-            penalty -= 1  # small reduction
-
-    # soft: minimize teacher gaps (approximate by counting gaps per teacher)
-    # we can approximate by counting distinct timeslots per teacher and expected lectures count
-    teacher_sessions = defaultdict(list)
-    for g in ind:
-        teacher_sessions[g['teacher']].append(g['timeslot'])
-    for t, slots in teacher_sessions.items():
-        # more spread-out timeslots -> small penalty proportional to number of unique slots
-        unique = len(set(slots))
-        # fewer sessions with same teacher increases fragmentation—this is a light soft penalty
-        penalty += max(0, unique - 3) * 0.5
+    penalty[rows] += SOFT_PENALTY * (~enc['teacher_available'][pop_teacher, pop_ts]).sum(axis=1)
+    # small reward for preferred timeslot (we model as negative penalty)
+    penalty[rows] -= enc['teacher_preferred'][pop_teacher, pop_ts].sum(axis=1)
 
     # convert to fitness (higher is better)
-    if penalty >= HARD_PENALTY:
-        return 1.0 / (1 + penalty)  # tiny fitness if hard violated
     return 1.0 / (1 + penalty)
 
 # ---------- Genetic operators ----------
-def tournament(pop, fitnesses, k=TOURNAMENT_K):
-    inds = random.sample(range(len(pop)), k)
-    best = max(inds, key=lambda i: fitnesses[i])
-    return copy.deepcopy(pop[best])
-
-def crossover(a, b):
-    n = len(a)
-    if n < 2:
-        return copy.deepcopy(a), copy.deepcopy(b)
-    pt = random.randint(1, n-1)
-    child1 = copy.deepcopy(a[:pt] + b[pt:])
-    child2 = copy.deepcopy(b[:pt] + a[pt:])
-    return child1, child2
-
-def mutate(ind, timeslots, rooms_ids, teachers, mutation_rate=MUTATION_RATE):
-    for i in range(len(ind)):
-        if random.random() < mutation_rate:
-            gene = ind[i]
-            # mutate one of timeslot/room/teacher randomly (smart-ish choices)
-            choice = random.choice(['timeslot','room','teacher'])
-            if choice == 'timeslot':
-                # prefer teacher's available timeslots if possible
-                avail = teachers[gene['teacher']]['available']
-                if avail:
-                    gene['timeslot'] = random.choice(avail)
-                else:
-                    gene['timeslot'] = random.choice(timeslots)
-            elif choice == 'room':
-                gene['room'] = random.choice(rooms_ids)
-            else:
-                # choose a qualified teacher if available else any teacher
-                qualified = [tid for tid,t in teachers.items() if gene['course'] in t['qualified']]
-                gene['teacher'] = random.choice(qualified) if qualified else random.choice(list(teachers.keys()))
-    return ind
-
-# ---------- Repair heuristic ----------
-def repair(ind, timeslots, rooms_ids, teachers, rooms_map):
-    # naive repair: reassign conflicting genes iteratively
-    def conflicts_count(gene, index, current):
-        cnt = 0
-        for j,other in enumerate(current):
-            if j == index: continue
-            if gene['timeslot'] == other['timeslot']:
-                if gene['teacher'] == other['teacher']:
-                    cnt += 1
-                if gene['room'] == other['room']:
-                    cnt += 1
-                if gene['group'] == other['group']:
-                    cnt += 1
-        # capacity conflict
-        if gene['size'] > rooms_map.get(gene['room'], 0):
-            cnt += 1
-        # qualification conflict
-        if gene['course'] not in teachers[gene['teacher']]['qualified']:
-            cnt += 1
-        return cnt
-
-    # attempt to fix each gene with conflicts by trying alternatives
-    current = ind
-    for i,g in enumerate(current):
-        if conflicts_count(g, i, current) > 0:
-            fixed = False
-            # try teacher's available slots first
-            candidate_teachers = [tid for tid,t in teachers.items() if g['course'] in t['qualified']]
-            candidate_teachers = candidate_teachers if candidate_teachers else list(teachers.keys())
-            # try combinations
-            attempts = []
-            for t in random.sample(candidate_teachers, min(len(candidate_teachers), 4)):
-                avail = teachers[t]['available'] if teachers[t]['available'] else timeslots
-                for ts in random.sample(avail, min(len(avail), 5)):
-                    for r in random.sample(rooms_ids, min(len(rooms_ids), 3)):
-                        attempts.append((t,ts,r))
-            for (t,ts,r) in attempts:
-                g_try = dict(g)
-                g_try['teacher'] = t
-                g_try['timeslot'] = ts
-                g_try['room'] = r
-                if conflicts_count(g_try, i, current) == 0 and g_try['size'] <= rooms_map.get(r,0):
-                    current[i] = g_try
-                    fixed = True
-                    break
-            if not fixed:
-                # last resort: randomize
-                g['teacher'] = random.choice(list(teachers.keys()))
-                g['timeslot'] = random.choice(timeslots)
-                g['room'] = random.choice(rooms_ids)
-    return current
+def tournament(fitnesses, n, k=TOURNAMENT_K):
+    # indices of the winners of n independent k-way tournaments, drawn in one go
+    candidates = rng.integers(0, len(fitnesses), size=(n, k))
+    return candidates[np.arange(n), fitnesses[candidates].argmax(axis=1)]
+
+def crossover(a, b, pts):
+    # one-point crossover of parent rows a[j], b[j] at pts[j]; callers reuse the same
+    # pts for every gene field
+    mask = np.arange(a.shape[1]) < pts[:, None]
+    return np.where(mask, a, b), np.where(mask, b, a)
+
+def mutation_rate_at(gen, generations):
+    # dynamic mutation: explore early, disturb good solutions less as the GA advances
+    progress = gen / max(1, generations - 1)
+    return MIN_MUTATION_RATE + (MUTATION_RATE - MIN_MUTATION_RATE) * (1 - progress)
+
+def mutate(pop_ts, pop_room, pop_teacher, sess, enc, mutation_rate=MUTATION_RATE):
+    # all random numbers for the generation are drawn up front in a few vector ops
+    shape = pop_ts.shape
+    mut_mask = rng.random(shape) < mutation_rate
+    rows, cols = mut_mask.nonzero()
+    # mutate one of timeslot/room/teacher randomly (smart-ish choices)
+    choice = rng.integers(0, 3, size=len(rows))
+    u = rng.random(len(rows))
+    # timeslot: prefer teacher's available timeslots if possible
+    m = choice == TS
+    pop_ts[rows[m], cols[m]] = _pick(enc['available_ptr'], enc['available_idx'],
+                                     pop_teacher[rows[m], cols[m]], u[m])
+    m = choice == ROOM
+    pop_room[rows[m], cols[m]] = (u[m] * len(enc['room_ids'])).astype(np.int32)
+    # teacher: choose a qualified teacher if available else any teacher
+    m = choice == TEACHER
+    pop_teacher[rows[m], cols[m]] = _pick(enc['qualified_ptr'], enc['qualified_idx'],
+                                          sess['course'][cols[m]], u[m])
 
 # ---------- GA main ----------
-def run_ga(sessions, timeslots, rooms, teachers, groups,
-           pop_size=POP_SIZE, generations=GENERATIONS):
-    rooms_map = {r['id']: r['cap'] for r in rooms}
-    rooms_ids = [r['id'] for r in rooms]
-    # init population
-    pop = [init_individual(sessions, timeslots, rooms, teachers) for _ in range(pop_size)]
+def next_generation(pop, fitnesses, sess, enc, mutation_rate):
+    # one host GA step; returns the new population and its fitness
+    pop_size, n = pop[0].shape
+    newpop = tuple(np.empty_like(a) for a in pop)
+    # elitism: top-ELITE selection in O(pop_size), order among elites is irrelevant
+    elite_idx = np.argpartition(fitnesses, -ELITE)[-ELITE:]
+    for src, dst in zip(pop, newpop):
+        dst[:ELITE] = src[elite_idx]
+    # selection and crossover for all parent pairs at once
+    n_children = pop_size - ELITE
+    n_pairs = (n_children + 1) // 2
+    parents = tournament(fitnesses, 2 * n_pairs, k=TOURNAMENT_K).reshape(n_pairs, 2)
+    pts = rng.integers(1, n, size=n_pairs) if n >= 2 else np.full(n_pairs, n)
+    for src, dst in zip(pop, newpop):
+        c1, c2 = crossover(src[parents[:, 0]], src[parents[:, 1]], pts)
+        # interleave pair children: c1[0], c2[0], c1[1], ...
+        dst[ELITE:] = np.stack([c1, c2], axis=1).reshape(-1, n)[:n_children]
+    # mutate and repair all children in place
+    children = tuple(a[ELITE:] for a in newpop)
+    mutate(*children, sess, enc, mutation_rate)
+    repair_batch(*children, sess['course'], sess['group'], sess['size'], enc['teacher_qualified'],
+                 enc['qualified_ptr'], enc['qualified_idx'], enc['available_ptr'], enc['available_idx'],
+                 enc['room_cap'], enc['rooms_by_cap'], len(enc['timeslots']), len(enc['group_ids']),
+                 rng.integers(2**31, size=n_children))
+    # elites carry their cached fitness; only the children are scored
+    new_fit = np.empty_like(fitnesses)
+    new_fit[:ELITE] = fitnesses[elite_idx]
+    new_fit[ELITE:] = fitness(*children, sess, enc)
+    return newpop, new_fit
+
+def run_ga(sessions, enc, pop_size=POP_SIZE, generations=GENERATIONS, use_cuda=False, max_time=None,
+           patience=STAGNATION_LIMIT):
+    # max_time: optional wall-clock budget in seconds for the evolution loop
+    # patience: generations without a new best before stopping (None or 0 runs all generations)
+    sess = encode_sessions(sessions, enc)
+    # init population: greedy constructive seeds plus random individuals for diversity
+    pop = init_population(sess, enc, pop_size)
+    start = time.perf_counter()
+    if use_cuda:
+        # imported lazily: needs numba.cuda and a GPU; the population then stays on the device
+        import ga_cuda
+        gpu = ga_cuda.upload_population(*pop, sess, enc, ELITE, RANDOM_SEED)
+        fitnesses = ga_cuda.device_fitness(gpu, HARD_PENALTY, SOFT_PENALTY)
+    else:
+        fitnesses = fitness(*pop, sess, enc)
     best_ind = None
     best_fit = -1
+    stagnant = 0
     for gen in range(generations):
-        fitnesses = [fitness(ind, rooms_map, teachers, groups) for ind in pop]
         # track best
-        for i,fv in enumerate(fitnesses):
-            if fv > best_fit:
-                best_fit = fv
-                best_ind = copy.deepcopy(pop[i])
+        i = int(np.argmax(fitnesses))
+        if fitnesses[i] > best_fit:
+            best_fit = float(fitnesses[i])
+            best_ind = ga_cuda.download_row(gpu, i) if use_cuda else tuple(a[i].copy() for a in pop)
+            stagnant = 0
+        else:
+            stagnant += 1
         # logging
         if gen % 20 == 0 or gen == generations-1:
             print(f"Gen {gen:4d} best_fitness {best_fit:.9f}")
@@ -261,57 +352,61 @@ def run_ga(sessions, timeslots, rooms, teachers, groups,
         if best_fit > 0.999999:
             print("Found near-perfect solution.")
             break
+        # early exit once the population has collapsed onto one fitness value
+        if np.std(fitnesses) <= DIVERSITY_TOL * best_fit:
+            print(f"Population converged at gen {gen}.")
+            break
+        # early exit on a fitness plateau or when the time budget is spent
+        if patience and stagnant >= patience:
+            print(f"No improvement for {stagnant} generations, stopping at gen {gen}.")
+            break
+        if max_time is not None and time.perf_counter() - start > max_time:
+            print(f"Time limit of {max_time}s reached at gen {gen}.")
+            break
         # make next generation
-        newpop = []
-        # elitism
-        sorted_idx = sorted(range(len(pop)), key=lambda i: fitnesses[i], reverse=True)
-        for idx in sorted_idx[:ELITE]:
-            newpop.append(copy.deepcopy(pop[idx]))
-        while len(newpop) < pop_size:
-            p1 = tournament(pop, fitnesses, k=TOURNAMENT_K)
-            p2 = tournament(pop, fitnesses, k=TOURNAMENT_K)
-            c1, c2 = crossover(p1, p2)
-            c1 = mutate(c1, timeslots, rooms_ids, teachers)
-            c2 = mutate(c2, timeslots, rooms_ids, teachers)
-            c1 = repair(c1, timeslots, rooms_ids, teachers, rooms_map)
-            c2 = repair(c2, timeslots, rooms_ids, teachers, rooms_map)
-            newpop.append(c1)
-            if len(newpop) < pop_size:
-                newpop.append(c2)
-        pop = newpop
+        rate = mutation_rate_at(gen, generations)
+        if use_cuda:
+            fitnesses = ga_cuda.device_generation(gpu, fitnesses, TOURNAMENT_K, rate, HARD_PENALTY, SOFT_PENALTY)
+        else:
+            pop, fitnesses = next_generation(pop, fitnesses, sess, enc, rate)
     return best_ind, best_fit
 
 # ---------- Output writer ----------
-def write_output(ind, out_csv="data/generated_timetable.csv"):
+def write_output(ind, sessions, enc, out_csv="data/generated_timetable.csv"):
     rows = []
-    for g in ind:
+    for s, ts, room, teacher in zip(sessions, *ind):
         rows.append({
-            'session_id': g['session_id'],
-            'course': g['course'],
-            'group': g['group'],
-            'timeslot': g['timeslot'],
-            'room': g['room'],
-            'teacher': g['teacher']
+            'session_id': s['session_id'],
+            'course': s['course'],
+            'group': s['group'],
+            'timeslot': enc['timeslots'][ts],
+            'room': enc['room_ids'][room],
+            'teacher': enc['teacher_ids'][teacher]
         })
     df = pd.DataFrame(rows)
     df.to_csv(out_csv, index=False)
     print(f"Wrote timetable to {out_csv}")
 
 # ---------- main ----------
-def main(data_dir="data"):
+def main(data_dir="data", use_cuda=False, max_time=None, patience=STAGNATION_LIMIT):
     courses_df, teachers_df, groups_df, rooms_df, timeslots_df = load_data(data_dir)
-    courses, teachers, groups, rooms, timeslots = preprocess(courses_df, teachers_df, groups_df, rooms_df, timeslots_df)
+    courses, teachers, groups, rooms, timeslots, enc = preprocess(courses_df, teachers_df, groups_df, rooms_df, timeslots_df)
     sessions = build_session_list(courses)
     print(f"Sessions to schedule: {len(sessions)}")
-    best, best_fit = run_ga(sessions, timeslots, rooms, teachers, groups)
+    best, best_fit = run_ga(sessions, enc, use_cuda=use_cuda, max_time=max_time, patience=patience)
     if best is None:
         print("GA failed to find a solution.")
         sys.exit(1)
-    write_output(best)
+    write_output(best, sessions, enc)
     print("Best fitness:", best_fit)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--data", "-d", default="data", help="data directory with CSVs")
+    parser.add_argument("--cuda", action="store_true", help="evolve the population on a CUDA GPU (no repair step)")
+    parser.add_argument("--max-time", type=float, default=None, help="wall-clock limit in seconds for the GA")
+    parser.add_argument("--patience", type=int, default=STAGNATION_LIMIT,
+                        help=f"stop after this many generations without improvement "
+                             f"(default: {STAGNATION_LIMIT}; 0 runs all generations)")
     args = parser.parse_args()
-    main(args.data)
+    main(args.data, args.cuda, args.max_time, args.patience)
@@ -1,28 +1,19 @@
 import pandas as pd
-from collections import defaultdict
 
 df = pd.read_csv("data/generated_timetable.csv")
 
-teacher_clash = defaultdict(int)
-room_clash = defaultdict(int)
-group_clash = defaultdict(int)
-
-for _, row in df.iterrows():
-    key_t = (row['teacher'], row['timeslot'])
-    key_r = (row['room'], row['timeslot'])
-    key_g = (row['group'], row['timeslot'])
-
-    teacher_clash[key_t] += 1
-    room_clash[key_r] += 1
-    group_clash[key_g] += 1
+# a (resource, timeslot) pair booked more than once is a clash
+teacher_clash = (df.groupby(['teacher', 'timeslot']).size() > 1).any()
+room_clash = (df.groupby(['room', 'timeslot']).size() > 1).any()
+group_clash = (df.groupby(['group', 'timeslot']).size() > 1).any()
 
 print("\n📋 VALIDATION REPORT\n")
 
 print("Teacher Clashes:")
-print("✔ 0 clashes" if all(v == 1 for v in teacher_clash.values()) else "❌ Clash detected")
+print("✔ 0 clashes" if not teacher_clash else "❌ Clash detected")
 
 print("\nRoom Clashes:")
-print("✔ 0 clashes" if all(v == 1 for v in room_clash.values()) else "❌ Clash detected")
+print("✔ 0 clashes" if not room_clash else "❌ Clash detected")
 
 print("\nGroup Clashes:")
-print("✔ 0 clashes" if all(v == 1 for v in group_clash.values()) else "❌ Clash detected")
+print("✔ 0 clashes" if not group_clash else "❌ Clash detected")
@@ -2,24 +2,20 @@ import pandas as pd
 import os
 
 # Load timetable
-df = pd.read_csv("../data/generated_timetable.csv")
+# ids are read as text so numeric ones (e.g. room 101) concatenate into the cells
+df = pd.read_csv("../data/generated_timetable.csv", dtype=str)
 
 # Split day and time
 df[['day', 'time']] = df['timeslot'].str.split('_', expand=True)
 
-def generate_html(filtered_df, title, filename):
-    days = sorted(filtered_df['day'].unique())
-    times = sorted(filtered_df['time'].unique())
-
-    table = {}
+# Cell content for every session, built once for all pages
+df['cell'] = ("<b>" + df['course'] + "</b><br>Room: " + df['room'] + "<br>Teacher: " + df['teacher'])
 
-    for _, row in filtered_df.iterrows():
-        key = (row['day'], row['time'])
-        table[key] = f"""
-        <b>{row['course']}</b><br>
-        Room: {row['room']}<br>
-        Teacher: {row['teacher']}
-        """
+def generate_html(filtered_df, title, filename):
+    # time x day grid; sessions sharing a slot are stacked in one cell
+    grid = (filtered_df.pivot_table(index='time', columns='day', values='cell', aggfunc='<br>'.join)
+                       .rename_axis(index=None, columns='Time / Day'))
+    table = grid.to_html(escape=False, na_rep='-', border=0, justify='center')
 
     html = f"""
     <html>
@@ -33,23 +29,7 @@ def generate_html(filtered_df, title, filename):
     </head>
     <body>
         <h2 align="center">{title}</h2>
-        <table>
-            <tr>
-                <th>Time / Day</th>
-    """
-
-    for d in days:
-        html += f"<th>{d}</th>"
-    html += "</tr>"
-
-    for t in times:
-        html += f"<tr><th>{t}</th>"
-        for d in days:
-            html += f"<td>{table.get((d, t), '-')}</td>"
-        html += "</tr>"
-
-    html += """
-        </table>
+        {table}
     </body>
     </html>
     """
@@ -63,11 +43,9 @@ def generate_html(filtered_df, title, filename):
 generate_html(df, "Automated Timetable Generator", "timetable.html")
 
 # 🧑‍🎓 Group-wise timetables
-for group in df['group'].unique():
-    group_df = df[df['group'] == group]
+for group, group_df in df.groupby('group', sort=False):
     generate_html(group_df, f"Timetable for Group {group}", f"group_{group}.html")
 
 # 🧑‍🏫 Teacher-wise timetables
-for teacher in df['teacher'].unique():
-    teacher_df = df[df['teacher'] == teacher]
+for teacher, teacher_df in df.groupby('teacher', sort=False):
     generate_html(teacher_df, f"Timetable for Teacher {teacher}", f"teacher_{teacher}.html")